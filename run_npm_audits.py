@@ -2,13 +2,82 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
+from collections import defaultdict
+import csv
+import fnmatch
 import json
 from datetime import datetime
+import functools
+import hashlib
+import itertools
 import os
+from pathlib import PurePath
+import re
 import shutil
 import subprocess
 import sys
-from typing import Dict, List, Set, Tuple, Any
+import time
+from typing import Dict, List, NamedTuple, Set, Tuple, Any
+
+# Per-user folder for everything this script caches between runs
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'audit-npm-packages')
+# Persisted audit results, reused while a project's package-lock.json is unchanged.
+# The index holds only lockfile digest/stat, npm args and timestamp per folder;
+# each project's raw audit JSON lives in its own file under AUDIT_RESULTS_DIR.
+AUDIT_CACHE_PATH = os.path.join(CACHE_DIR, 'audit-cache.json')
+AUDIT_RESULTS_DIR = os.path.join(CACHE_DIR, 'results')
+# npm cache shared by all audits; per-user, not in the world-writable temp dir
+NPM_CACHE_DIR = os.path.join(CACHE_DIR, 'npm-cache')
+# Cached results older than this are re-audited so newly published advisories are picked up
+AUDIT_CACHE_MAX_AGE = 24 * 60 * 60
+# Upper bound on cached projects; the least recently audited are dropped first
+AUDIT_CACHE_MAX_ENTRIES = 2000
+
+# One shared decoder for the hot parse paths (npm output, package.json fallback);
+# decoding bytes explicitly skips json.loads' per-call encoding detection
+_JSON_DECODE = json.JSONDecoder().decode
+
+# Matches a "version": "x.y.z" member in the leading bytes of a package.json
+_VERSION_RE = re.compile(rb'"version"\s*:\s*"([^"]+)"')
+_VERSION_SCAN_BYTES = 8192
+
+# Folder names never descended into during discovery (compared lower-cased):
+# dependencies, VCS metadata and common build output
+SKIP_DIRS = frozenset({
+    'node_modules', '.git', '__pycache__',
+    'dist', 'build', '.next', 'coverage', 'out', 'target',
+})
+# Python virtualenv / site-packages folders, skipped when exclude_venvs is set
+VENV_SKIP_DIRS = frozenset({'.venv', 'venv', 'env', 'site-packages'})
+# Optional file in the start folder listing extra folders to skip
+AUDIT_IGNORE_FILE = '.audit-ignore'
+
+
+class CriticalIssue(NamedTuple):
+    """A critical finding extracted from npm audit JSON.
+
+    A named tuple keeps each issue compact (no per-instance dict) while
+    allowing attribute access. Use `to_dict` when serializing, since json
+    would otherwise write the tuple as a list.
+    """
+    module_name: str | None = None
+    severity: str | None = None
+    finding: Dict | None = None
+    id: str | None = None
+    url: str | None = None
+    title: str | None = None
+    # counts from the audit metadata, set only on the summary note
+    metadata: Dict | None = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Rebuild the dict each kind of issue has always had in the report,
+        # keeping null advisory fields and the original key order
+        if self.metadata is not None:
+            return {'metadata': self.metadata}
+        if self.id is not None:
+            return {'id': self.id, 'title': self.title, 'severity': self.severity, 'module_name': self.module_name, 'url': self.url, 'finding': self.finding}
+        return {'module_name': self.module_name, 'severity': self.severity, 'finding': self.finding}
 
 
 def check_npm_available() -> bool:
@@ -50,45 +119,109 @@ def diag_npm_env() -> None:
     print('=== end diagnostic ===\n')
 
 
-def discover_project_dirs(start: str, exclude_venvs: bool = True) -> List[str]:
+def load_audit_ignore(start: str) -> List[str]:
+    """Load folder patterns from `.audit-ignore` in `start`, if present.
+
+    A small subset of .gitignore syntax is supported: one glob per line,
+    blank lines and `#` comments are ignored, and a trailing `/` is allowed.
+    Patterns without a `/` match a folder name anywhere; patterns containing
+    one match the folder's path relative to `start` (a leading `/` is optional).
+    """
+    try:
+        with open(os.path.join(start, AUDIT_IGNORE_FILE), 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return []
+    patterns: List[str] = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        patterns.append(line.rstrip('/'))
+    return [pat for pat in patterns if pat]
+
+
+def _is_ignored(rel_path: str, name: str, patterns: List[str]) -> bool:
+    for pat in patterns:
+        if '/' in pat:
+            if fnmatch.fnmatch(rel_path, pat.lstrip('/')):
+                return True
+        elif fnmatch.fnmatch(name, pat):
+            return True
+    return False
+
+
+def discover_project_dirs(start: str, exclude_venvs: bool = True, max_depth: int | None = None) -> List[Tuple[str, float | None, int | None]]:
     """Recursively discover folders containing package.json or package-lock.json.
 
+    Returns sorted (folder, lockfile_mtime, lockfile_size) tuples; the stat
+    fields are None when the folder has no package-lock.json.
+
     When exclude_venvs is True, skip common Python virtualenv/site-packages
     locations (for example: .venv, venv, env, Lib/site-packages, share/jupyter)
     to avoid trying to run `npm` in those irrelevant folders.
+
+    Folders matching SKIP_DIRS or a pattern in the start folder's
+    `.audit-ignore` are skipped too, as is anything deeper than `max_depth`
+    levels below `start` when it is given. Skipped folders are pruned before
+    they are opened, so their subtrees are never listed.
     """
     
     print(f'Searching for npm projects under: {start}\n')
-    found: Set[str] = set()
-    for root, dirs, files in os.walk(start):
-        # skip node_modules folders to avoid walking dependencies
-        parts = [p.lower() for p in root.split(os.sep) if p]
-        if 'node_modules' in parts:
+    skip_dirs = SKIP_DIRS | VENV_SKIP_DIRS if exclude_venvs else SKIP_DIRS
+    ignore_patterns = load_audit_ignore(start)
+    found: Dict[str, Tuple[float, int] | None] = {}
+    stack = [(start, 0)]
+    while stack:
+        cur, depth = stack.pop()
+        try:
+            entries = os.scandir(cur)
+        except OSError:
+            # unreadable folders are skipped, as os.walk did
             continue
-
-        # Optionally skip typical Python virtualenv / site-packages locations
-        if exclude_venvs:
-            if any(p in ('.venv', 'venv', 'env') for p in parts):
-                continue
-            if 'site-packages' in parts:
-                continue
-            # skip shared jupyter extension folders under virtualenvs
-            if 'share' in parts and 'jupyter' in parts:
-                continue
-
-        if 'package.json' in files or 'package-lock.json' in files:
-            found.add(root)
-            print(root)
-    return sorted(found)
-
-
-def load_check_targets(path: str) -> Set[str]:
+        with entries:
+            for entry in entries:
+                name = entry.name.lower()
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                if is_dir:
+                    if name in skip_dirs:
+                        continue
+                    # skip shared jupyter extension folders under virtualenvs
+                    if exclude_venvs and name == 'jupyter' and os.path.basename(cur).lower() == 'share':
+                        continue
+                    if max_depth is not None and depth >= max_depth:
+                        continue
+                    if ignore_patterns and _is_ignored(os.path.relpath(entry.path, start).replace(os.sep, '/'), entry.name, ignore_patterns):
+                        continue
+                    stack.append((entry.path, depth + 1))
+                elif name in ('package.json', 'package-lock.json'):
+                    if cur not in found:
+                        found[cur] = None
+                    if name == 'package-lock.json':
+                        # stat now, while the directory entry is at hand, so
+                        # unchanged lockfiles can be recognized without opening them
+                        try:
+                            st = entry.stat()
+                        except OSError:
+                            continue
+                        found[cur] = (st.st_mtime, st.st_size)
+    folders = sorted(found)
+    # one write for the whole listing instead of a line-buffered print per hit
+    if folders:
+        print('\n'.join(folders))
+    return [(folder, *(found[folder] or (None, None))) for folder in folders]
+
+
+def load_check_targets(path: str) -> Dict[str, Set[str]]:
     """Load a JSON file containing an array of targets.
 
     Expected format supported:
     - ["module@version", "other@1.2.3"]
 
-    Returns a set of normalized strings: "module@version" with module lower-cased.
+    Returns a dict mapping each lower-cased module name to its set of versions.
     """
     try:
         with open(path, 'r', encoding='utf-8') as f:
@@ -96,30 +229,40 @@ def load_check_targets(path: str) -> Set[str]:
     except Exception as e:
         raise SystemExit(f"Failed to load check file {path}: {e}")
 
-    targets: Set[str] = set()
+    targets: Dict[str, Set[str]] = defaultdict(set)
     if isinstance(data, list):
         for item in data:
             if not isinstance(item, str):
                 raise SystemExit(f"Invalid check file entry (must be strings like 'module@version'): {item!r}")
             if '@' in item:
-                mod, ver = item.split('@', 1)
-                targets.add(f"{mod.lower()}@{ver}")
+                # split on the last '@' so scoped names like '@scope/pkg@1.0.0' survive
+                mod, _, ver = item.rpartition('@')
+                if not mod or not ver:
+                    raise SystemExit(f"Invalid check file entry (must be strings like 'module@version'): {item!r}")
+                targets[mod.lower()].add(ver)
     else:
         raise SystemExit(f"Check file must contain a JSON array of targets: {path}")
 
-    return targets
+    return dict(targets)
 
 
+@functools.lru_cache(maxsize=4096)
 def _read_package_version_from_path(pkg_path: str) -> Any:
-    pj = os.path.join(pkg_path, 'package.json')
-    if os.path.exists(pj):
-        try:
-            with open(pj, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return data.get('version')
-        except Exception:
-            return None
-    return None
+    # package.json versions do not change during a run, so results are memoized.
+    # The version sits near the top of virtually every package.json, so scan the
+    # first block with a regex and only fully parse files where it is not found.
+    try:
+        with open(os.path.join(pkg_path, 'package.json'), 'rb') as f:
+            head = f.read(_VERSION_SCAN_BYTES)
+            m = _VERSION_RE.search(head)
+            if m:
+                return m.group(1).decode('utf-8', errors='replace')
+            if len(head) < _VERSION_SCAN_BYTES:
+                return None
+            data = _JSON_DECODE((head + f.read()).decode('utf-8-sig'))
+    except (OSError, ValueError):
+        return None
+    return data.get('version') if isinstance(data, dict) else None
 
 
 def _node_path_to_fs_path(node_path: str, project_root: str) -> str:
@@ -128,105 +271,263 @@ def _node_path_to_fs_path(node_path: str, project_root: str) -> str:
     return os.path.normpath(os.path.join(project_root, node_path))
 
 
-def _find_version_from_nodes(nodes: List[str], project_root: str) -> Any:
-    # Try to resolve package versions by walking up from node paths
+@functools.lru_cache(maxsize=4096)
+def _find_package_version(fs_path: str) -> Tuple[Any, str | None]:
+    """Walk up from `fs_path` to the nearest package.json carrying a version.
+
+    Returns (version, folder) or (None, None). At most six levels are checked.
+    Results are memoized since many findings share the same node paths.
+    """
+    # PurePath.parents yields each ancestor lazily and stops at the root
+    ancestors = itertools.chain((fs_path,), map(str, PurePath(fs_path).parents))
+    for cur in itertools.islice(ancestors, 6):
+        # no isdir() check: opening package.json fails just the same when
+        # the folder is missing, and saves a stat per level
+        ver = _read_package_version_from_path(cur)
+        if ver:
+            return ver, cur
+    return None, None
+
+
+@functools.lru_cache(maxsize=4096)
+def _find_version_from_nodes(nodes: Tuple[str, ...], project_root: str) -> Tuple[Any, str | None]:
+    # Try to resolve package versions by walking up from node paths. Memoized
+    # on the node tuple, since issues in a project often share identical nodes
     for node in nodes:
-        fs_path = _node_path_to_fs_path(node, project_root)
-        cur = fs_path
-        for _ in range(6):
-            if os.path.isdir(cur):
-                ver = _read_package_version_from_path(cur)
-                if ver:
-                    return ver
-            parent = os.path.dirname(cur)
-            if not parent or parent == cur:
-                break
-            cur = parent
-    return None
-
-
-def issue_matches_targets(issue: Dict, targets: Set[str], project_root: str) -> bool:
+        ver, path = _find_package_version(_node_path_to_fs_path(node, project_root))
+        if ver:
+            return ver, path
+    return None, None
+
+
+def issue_matches_targets(issue: CriticalIssue, targets: Dict[str, Set[str]], project_root: str) -> bool:
     """Return True if the issue corresponds to any target in `targets`.
 
-    Matching logic (best-effort):
+    Matching logic (best-effort), cheapest checks first:
+    - Check finding.version, finding.range
     - Check 'via' entries for module@version strings or dicts with 'version'
-    - Check finding.version, finding.range, issue.range
     - Inspect 'nodes' and read nearby package.json versions
     """
-    module = issue.get('module_name') or issue.get('id') or (issue.get('finding') or {}).get('name')
+    module = issue.module_name or issue.id or (issue.finding or {}).get('name')
     if not module:
         return False
     module_l = module.lower()
-    finding = issue.get('finding') or {}
+    # Modules that are not targeted cannot match, so skip all further work
+    versions = targets.get(module_l)
+    if not versions:
+        return False
+    finding = issue.finding or {}
 
-    # 1) via entries
+    # 1) direct version/range fields
+    ver = finding.get('version')
+    if ver and ver in versions:
+        return True
+
+    rng = finding.get('range')
+    if rng and rng in versions:
+        return True
+
+    # 2) via entries
     via = finding.get('via') or []
     if isinstance(via, list):
         for v in via:
             if isinstance(v, str) and '@' in v:
                 mod, ver = v.rsplit('@', 1)
-                if mod.lower() == module_l and f"{module_l}@{ver}" in targets:
+                if mod.lower() == module_l and ver in versions:
                     return True
             elif isinstance(v, dict):
                 ver = v.get('version')
                 modname = v.get('name') or module
-                if ver and modname.lower() == module_l and f"{module_l}@{ver}" in targets:
+                if ver and modname.lower() == module_l and ver in versions:
                     return True
 
-    # 2) direct version/range fields
-    ver = finding.get('version')
-    if ver and f"{module_l}@{ver}" in targets:
-        return True
-
-    rng = finding.get('range') or issue.get('range')
-    if rng and f"{module_l}@{rng}" in targets:
-        return True
-
     # 3) nodes -> filesystem lookup
     nodes = finding.get('nodes') or []
     if isinstance(nodes, list) and nodes:
-        found = _find_version_from_nodes(nodes, project_root)
-        if found and f"{module_l}@{found}" in targets:
+        found, _ = _find_version_from_nodes(tuple(nodes), project_root)
+        if found and found in versions:
             return True
 
     return False
 
 
-def run_npm_audit(folder: str, timeout: int = 60) -> Dict:
-    """Run `npm audit --json` in the given folder and return parsed JSON output or an error dict."""
+def load_audit_cache(path: str) -> Dict[str, Dict]:
+    """Load the persisted audit cache index keyed by project folder.
 
+    A missing or unreadable cache file yields an empty cache rather than an
+    error; the cache only ever saves work.
+    """
     try:
-        # Use subprocess to run npm audit
-        proc = subprocess.run(run_npm_audit.cmdline, cwd=folder, capture_output=True, text=True, timeout=timeout, )
-    except subprocess.TimeoutExpired:
-        return {'error': 'timeout', 'folder': folder}
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    for cached in data.values():
+        # older caches embedded the raw audit data in the index
+        if isinstance(cached, dict):
+            cached.pop('data', None)
+    return data
+
+
+def _cached_result_path(folder: str) -> str:
+    return os.path.join(AUDIT_RESULTS_DIR, f"{hashlib.sha1(folder.encode('utf-8')).hexdigest()}.json")
+
+
+def load_cached_result(folder: str) -> Dict | None:
+    """Return the cached raw audit JSON for `folder`, or None if it is unavailable."""
+    try:
+        with open(_cached_result_path(folder), 'r', encoding='utf-8') as f:
+            data = _JSON_DECODE(f.read())
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def store_cached_result(folder: str, data: Dict) -> None:
+    os.makedirs(AUDIT_RESULTS_DIR, exist_ok=True)
+    with open(_cached_result_path(folder), 'w', encoding='utf-8') as f:
+        f.write(json.dumps(data))
+
+
+def prune_audit_cache(cache: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Return the cache without entries that can never be used again.
+
+    Entries older than AUDIT_CACHE_MAX_AGE or for folders that no longer
+    exist are dropped, and only the AUDIT_CACHE_MAX_ENTRIES most recently
+    audited projects are kept.
+    """
+    now = time.time()
+    live = [
+        (folder, cached) for folder, cached in cache.items()
+        if isinstance(cached, dict) and now - cached.get('audited_at', 0) < AUDIT_CACHE_MAX_AGE and os.path.isdir(folder)
+    ]
+    live.sort(key=lambda item: item[1].get('audited_at', 0), reverse=True)
+    return dict(live[:AUDIT_CACHE_MAX_ENTRIES])
+
+
+def save_audit_cache(cache: Dict[str, Dict], path: str) -> None:
+    """Write the pruned audit cache index to `path`, replacing any previous file atomically.
+
+    Result files of pruned entries are deleted.
+    """
+    kept = prune_audit_cache(cache)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(kept, f)
+    os.replace(tmp_path, path)
+    for folder in cache.keys() - kept.keys():
+        try:
+            os.remove(_cached_result_path(folder))
+        except OSError:
+            pass
+
+
+def _lockfile_digest(folder: str) -> str | None:
+    """Return the sha256 of the folder's package-lock.json, or None if it has none."""
+    try:
+        with open(os.path.join(folder, 'package-lock.json'), 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def _decode_output(output: bytes | None) -> str:
+    return (output or b'').decode('utf-8', errors='replace')
+
+
+def _is_cache_fresh(cached: Dict) -> bool:
+    # --online asks for fresh audits, so no cached result qualifies
+    if run_npm_audit.online:
+        return False
+    # Results from a different npm audit command line (e.g. --omit=dev) do not apply
+    if cached.get('args') != run_npm_audit.cmdline[1:]:
+        return False
+    return time.time() - cached.get('audited_at', 0) < AUDIT_CACHE_MAX_AGE
+
+
+async def run_npm_audit(folder: str, timeout: int = 60, lock_stat: Tuple[float, int] | None = None) -> Dict:
+    """Run `npm audit --json` in the given folder and return parsed JSON output or an error dict.
+
+    When `run_npm_audit.cache` is a dict, a previous result for the folder is
+    returned without running npm as long as its package-lock.json is unchanged
+    and the result is younger than AUDIT_CACHE_MAX_AGE. Successful audits are
+    written back to the cache together with `lock_stat`, the lockfile's
+    (mtime, size) as seen during discovery; the raw JSON goes to a per-project
+    file so the in-memory cache holds no audit data.
+    """
+
+    cache = run_npm_audit.cache
+    digest = _lockfile_digest(folder) if cache is not None else None
+    mtime, size = lock_stat or (None, None)
+    if digest:
+        cached = cache.get(folder)
+        data = load_cached_result(folder) if cached and cached.get('sha256') == digest and _is_cache_fresh(cached) else None
+        if data is not None:
+            # same content under a new mtime: refresh the stat fields so the
+            # next run can skip hashing
+            cached['mtime'], cached['size'] = mtime, size
+            return {'data': data, 'cached': True}
+
+    try:
+        # Use a subprocess to run npm audit; output is read as bytes and
+        # decoded here, not by the subprocess machinery
+        proc = await asyncio.create_subprocess_exec(*run_npm_audit.cmdline, cwd=folder, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=run_npm_audit.env)
     except FileNotFoundError as e:
         return {'error': 'not_found', 'message': str(e), 'folder': folder}
 
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            # npm exited between the deadline and the kill
+            pass
+        await proc.wait()
+        return {'error': 'timeout', 'folder': folder}
+
     if proc.returncode not in (0, 1):
         # npm audit returns 1 when vulnerabilities are found; non-0/1 indicates issues
-        return {'error': 'npm_failed', 'returncode': proc.returncode, 'stderr': proc.stderr}
+        return {'error': 'npm_failed', 'returncode': proc.returncode, 'stderr': _decode_output(stderr)}
 
     # Try to parse JSON
     try:
-        data = json.loads(proc.stdout or '{}')
+        data = _JSON_DECODE(stdout.decode('utf-8-sig') if stdout else '{}')
     except Exception:
-        return {'error': 'invalid_json', 'stdout': proc.stdout, 'stderr': proc.stderr}
+        return {'error': 'invalid_json', 'stdout': _decode_output(stdout), 'stderr': _decode_output(stderr)}
 
-    return {'data': data, 'stdout': proc.stdout}
+    if digest:
+        try:
+            store_cached_result(folder, data)
+        except OSError:
+            # not fatal; the project is simply audited again next run
+            cache.pop(folder, None)
+        else:
+            cache[folder] = {'sha256': digest, 'mtime': mtime, 'size': size, 'args': run_npm_audit.cmdline[1:], 'audited_at': time.time()}
+
+    # The raw stdout is not returned: once parsed it would only double the
+    # memory held for every pending result
+    return {'data': data}
 
 
-def extract_critical_issues(audit_data: Dict) -> List[Dict]:
+def extract_critical_issues(audit_data: Dict, targets: Dict[str, Set[str]] | None = None, project_root: str | None = None) -> List[CriticalIssue]:
     """Extract critical issues from npm audit JSON.
 
     The audit JSON schema has varied between npm versions; this helper checks
     multiple places where vulnerabilities/advisories may appear and extracts
     items labeled with severity 'critical'.
 
-    Returns a list of issue dicts (preserving some original fields).
+    When `targets` is given, only issues matching them (see
+    `issue_matches_targets`, resolved against `project_root`) are returned,
+    and the metadata summary note is omitted.
+
+    Returns a list of CriticalIssue (preserving some original fields).
     """
     
-    issues: List[Dict] = []
+    issues: List[CriticalIssue] = []
     # npm audit v6 schema places advisories in 'advisories' or 'vulnerabilities' depending on npm version
     if not audit_data:
         return issues
@@ -236,7 +537,10 @@ def extract_critical_issues(audit_data: Dict) -> List[Dict]:
     for key, info in (adv.items() if isinstance(adv, dict) else []):
         severity = info.get('severity') or info.get('vuln', {}).get('severity')
         if severity == 'critical':
-            issues.append({'id': key, 'title': info.get('title'), 'severity': severity, 'module_name': info.get('module_name'), 'url': info.get('url'), 'finding': info})
+            issue = CriticalIssue(id=key, title=info.get('title'), severity=severity, module_name=info.get('module_name'), url=info.get('url'), finding=info)
+            if targets and not issue_matches_targets(issue, targets, project_root):
+                continue
+            issues.append(issue)
 
     # newer format: vulnerabilities map
     vulns = audit_data.get('vulnerabilities') or {}
@@ -244,22 +548,54 @@ def extract_critical_issues(audit_data: Dict) -> List[Dict]:
         sev = info.get('severity')
         if sev == 'critical':
             # include paths and via info
-            issues.append({'module_name': name, 'severity': sev, 'finding': info})
+            issue = CriticalIssue(module_name=name, severity=sev, finding=info)
+            if targets and not issue_matches_targets(issue, targets, project_root):
+                continue
+            issues.append(issue)
 
-    # Also check 'metadata' summary
+    # Also check 'metadata' summary; it cannot match explicit targets
     metadata = audit_data.get('metadata') or {}
-    if metadata.get('vulnerabilities', {}).get('critical'):
+    if not targets and metadata.get('vulnerabilities', {}).get('critical'):
         # metadata contains counts; include as a high-level note
-        issues.append({'metadata': metadata})
+        issues.append(CriticalIssue(metadata=metadata))
 
     return issues
 
 
+def write_report(report: Dict[str, Any], out_path: str) -> None:
+    """Write the audit report to `out_path` as JSON.
+
+    `json.dump(..., indent=2)` runs the pure-Python encoder over the whole
+    report. Instead, each top-level value and each `results` entry is encoded
+    separately by the C encoder and written out straight away, one entry per
+    line.
+    """
+    with open(out_path, 'w', encoding='utf-8') as out:
+        out.write('{')
+        for i, (key, value) in enumerate(report.items()):
+            out.write(',\n  ' if i else '\n  ')
+            out.write(f'{json.dumps(key)}: ')
+            if key == 'results':
+                out.write('[')
+                for j, entry in enumerate(value):
+                    out.write(',\n    ' if j else '\n    ')
+                    issues = [issue.to_dict() for issue in entry.get('critical_issues') or []]
+                    out.write(json.dumps({**entry, 'critical_issues': issues}))
+                out.write('\n  ]' if value else ']')
+            else:
+                out.write(json.dumps(value))
+        out.write('\n}\n')
+
+
 def main(argv: List[str] | None = None) -> int:
     # Only accept a start path; all other settings are fixed to sensible defaults
     p = argparse.ArgumentParser(description='Run npm audit across discovered npm projects')
     p.add_argument('--start', '-s', help='Start folder to search (default current dir)', default='.')
     p.add_argument('--check-file', '-c', help='Path to JSON file containing module@version entries to explicitly check')
+    p.add_argument('--no-cache', action='store_true', help='Re-audit every project instead of reusing cached results for unchanged lockfiles')
+    p.add_argument('--online', action='store_true', help='Re-run every audit with fresh registry metadata instead of reusing cached results or preferring the shared npm cache')
+    p.add_argument('--max-depth', type=int, help='Only search this many folder levels below the start folder')
+    p.add_argument('--omit-dev', action='store_true', help='Only audit production dependencies (passes --omit=dev to npm audit)')
     args = p.parse_args(argv)
 
     start = os.path.abspath(args.start)
@@ -275,43 +611,103 @@ def main(argv: List[str] | None = None) -> int:
         diag_npm_env()
         return 3
 
-    # Use the resolved npm executable
-    run_npm_audit.cmdline = [npm_path, 'audit', '--json']
+    # Use the resolved npm executable; only critical findings are reported, so
+    # let npm's exit code reflect just those
+    run_npm_audit.cmdline = [npm_path, 'audit', '--json', '--audit-level=critical']
+    if args.omit_dev:
+        run_npm_audit.cmdline.append('--omit=dev')
+    # Share one npm cache across all audits so registry metadata fetched for
+    # one project is reused by siblings with overlapping dependency trees.
+    # npm_config_offline is deliberately not used: npm skips the audit
+    # entirely in offline mode.
+    run_npm_audit.env = {**os.environ, 'npm_config_cache': NPM_CACHE_DIR}
+    if not args.online:
+        run_npm_audit.env['npm_config_prefer_offline'] = 'true'
+    # Reuse results from previous runs for projects whose lockfile is unchanged;
+    # --online still refreshes the cache but never reads from it
+    run_npm_audit.cache = None if args.no_cache else load_audit_cache(AUDIT_CACHE_PATH)
+    run_npm_audit.online = args.online
     # Load explicit check targets if provided
-    check_targets: Set[str] | None = None
+    check_targets: Dict[str, Set[str]] | None = None
     if args.check_file:
         check_targets = load_check_targets(args.check_file)
-        print(f'Loaded {len(check_targets)} explicit package@version targets from {args.check_file}')
+        print(f'Loaded {sum(len(v) for v in check_targets.values())} explicit package@version targets from {args.check_file}')
     timeout = 60
 
     # Keep excluding common Python virtualenvs by default
-    project_dirs = discover_project_dirs(start, exclude_venvs=True)
+    projects = discover_project_dirs(start, exclude_venvs=True, max_depth=args.max_depth)
+    project_dirs = [proj for proj, _, _ in projects]
     print(f'\nFound {len(project_dirs)} project directories under {start}')
 
     report = {'start': start, 'projects_scanned': len(project_dirs), 'results': []}
 
+    # Build output filename from the start folder name and a local timestamp
+    ts = datetime.now().astimezone().strftime('%Y%m%dT%H%M%S%z')
+    start_name = os.path.basename(os.path.normpath(start)) or 'root'
+    base_name = f"audits-{start_name}_{ts}"
+    out_path = f"{base_name}.json"
+    # Raw audit JSON is written here as each audit completes rather than kept
+    # in memory until the report is written
+    raw_dir = os.path.join(base_name, 'raw')
+    if project_dirs:
+        os.makedirs(raw_dir, exist_ok=True)
+
     print()
 
-    for proj in project_dirs:
-        print('Auditing:', proj)
-        res = run_npm_audit(proj)
-        entry = {'folder': proj, 'error': None, 'critical_issues': [], 'raw': None}
+    # npm audit is I/O-bound (node startup, disk, network), so run several at
+    # once; each audit is its own node process awaited on the event loop.
+    max_workers = max(1, min(8, (os.cpu_count() or 1) * 2, len(project_dirs)))
+    entries: Dict[str, Dict] = {}
+
+    def record(proj: str, res: Dict) -> None:
+        print('Audited:', proj + (' (cached)' if res.get('cached') else ''))
+        entry = {'folder': proj, 'error': None, 'critical_issues': [], 'raw_path': None}
         if 'error' in res:
             entry['error'] = res
         else:
             data = res.get('data') or {}
-            entry['raw'] = data
-            issues = extract_critical_issues(data)
-            if check_targets:
-                # Filter issues: only keep those that match the explicit targets
-                filtered: List[Dict] = []
-                for issue in issues:
-                    if issue_matches_targets(issue, check_targets, proj):
-                        filtered.append(issue)
-                entry['critical_issues'] = filtered
-            else:
-                entry['critical_issues'] = issues
-        report['results'].append(entry)
+            raw_path = os.path.join(raw_dir, f"{hashlib.sha1(proj.encode('utf-8')).hexdigest()[:12]}.json")
+            with open(raw_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(data))
+            entry['raw_path'] = raw_path
+            # Only issues matching the explicit targets are kept when given
+            entry['critical_issues'] = extract_critical_issues(data, check_targets, proj)
+        entries[proj] = entry
+
+    async def audit_one(sem: asyncio.Semaphore, proj: str, lock_stat: Tuple[float, int] | None) -> Tuple[str, Dict]:
+        async with sem:
+            return proj, await run_npm_audit(proj, timeout, lock_stat)
+
+    async def audit_all() -> None:
+        # created here so it binds to the loop started by asyncio.run
+        sem = asyncio.Semaphore(max_workers)
+        cache = run_npm_audit.cache
+        pending = []
+        for proj, mtime, size in projects:
+            # A lockfile with the size and mtime seen last time is a cache hit
+            # without even reading it; anything else goes to run_npm_audit,
+            # which still checks the content hash
+            cached = cache.get(proj) if cache is not None and mtime is not None else None
+            if cached and cached.get('mtime') == mtime and cached.get('size') == size and _is_cache_fresh(cached):
+                data = load_cached_result(proj)
+                if data is not None:
+                    record(proj, {'data': data, 'cached': True})
+                    continue
+            lock_stat = (mtime, size) if mtime is not None else None
+            pending.append(audit_one(sem, proj, lock_stat))
+        for next_done in asyncio.as_completed(pending):
+            record(*await next_done)
+
+    asyncio.run(audit_all())
+
+    # Keep results in discovery order regardless of completion order
+    report['results'] = [entries[proj] for proj in project_dirs]
+
+    if run_npm_audit.cache is not None:
+        try:
+            save_audit_cache(run_npm_audit.cache, AUDIT_CACHE_PATH)
+        except OSError as e:
+            print('\nWarning: failed to write audit cache:', e, file=sys.stderr)
 
     # Tally critical counts
     total_critical = sum(len(e.get('critical_issues') or []) for e in report['results'])
@@ -320,14 +716,7 @@ def main(argv: List[str] | None = None) -> int:
     # add a local timestamp for when the report was generated
     report['generated_at'] = datetime.now().astimezone().isoformat()
 
-    # Build output filename from the start folder name and a local timestamp
-    ts = datetime.now().astimezone().strftime('%Y%m%dT%H%M%S%z')
-    start_name = os.path.basename(os.path.normpath(start)) or 'root'
-    base_name = f"audits-{start_name}_{ts}"
-    out_path = f"{base_name}.json"
-
-    with open(out_path, 'w', encoding='utf-8') as out:
-        json.dump(report, out, indent=2)
+    write_report(report, out_path)
 
     print('\nWrote report to', out_path)
 
@@ -335,8 +724,9 @@ def main(argv: List[str] | None = None) -> int:
     try:
         base, ext = os.path.splitext(out_path)
         summary_path = f"{base}_critical_versions{ext or '.json'}"
-        summarize_critical_versions(report, summary_path)
+        table_path = summarize_critical_versions(report, summary_path)
         print('\nWrote module@version summary to', summary_path)
+        print('Wrote module@version occurrence table to', table_path)
     except Exception as e:
         print('\nWarning: failed to write module@version summary:', e, file=sys.stderr)
 
@@ -344,13 +734,39 @@ def main(argv: List[str] | None = None) -> int:
 
     return 0
 
-def summarize_critical_versions(report: Dict[str, Any], output_path: str, top_n: int | None = None) -> None:
+def write_occurrence_table(columns: Dict[str, List[Any]], base_path: str) -> str:
+    """Write per-occurrence columns as a table for analytics tools.
+
+    Writes `<base_path>.parquet` (zstd-compressed) when pyarrow is installed,
+    otherwise falls back to `<base_path>.csv`. Returns the path written.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        path = f"{base_path}.csv"
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            writer.writerows(zip(*columns.values()))
+        return path
+
+    path = f"{base_path}.parquet"
+    pq.write_table(pa.table(columns), path, compression='zstd')
+    return path
+
+
+def summarize_critical_versions(report: Dict[str, Any], output_path: str, top_n: int | None = None) -> str:
     """Summarize module@version occurrences for critical findings.
 
     This function reads the `report` structure generated by the audit run and
-    builds a counts map keyed by "module@version". It also gathers example
-    locations for each module name. The result is written to `output_path` as
-    JSON and a short, human-friendly list is printed to stdout.
+    builds a counts map keyed by (module, version), written out as
+    "module@version". It also gathers example locations for each module
+    name. The result is written to `output_path` as JSON and a short,
+    human-friendly list is printed to stdout.
+
+    Every occurrence is also written as a module/version/path/project table
+    next to `output_path` (see `write_occurrence_table`); its path is returned.
 
     Parameters
     ----------
@@ -362,64 +778,36 @@ def summarize_critical_versions(report: Dict[str, Any], output_path: str, top_n:
         Optional limit for the printed/top array in the summary file. If None,
         all entries are included.
     """
-    from collections import Counter, defaultdict
-
-    def read_package_version(pkg_path: str) -> Any:
-        """Return the package.json's version if present, else None."""
-        pj = os.path.join(pkg_path, 'package.json')
-        if os.path.exists(pj):
-            try:
-                with open(pj, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return data.get('version')
-            except Exception:
-                return None
-        return None
-
-    def node_path_to_fs_path(node_path: str, project_root: str) -> str:
-        """Convert audit 'node' path to filesystem path (relative to project root).
-
-        If the node_path is absolute, it is returned unchanged.
-        """
-        if os.path.isabs(node_path):
-            return node_path
-        return os.path.normpath(os.path.join(project_root, node_path))
+    from collections import Counter
 
     counts: Counter = Counter()
     examples: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    columns: Dict[str, List[Any]] = {'module': [], 'version': [], 'path': [], 'project': []}
 
     for entry in report.get('results', []):
         proj = entry.get('folder')
         for issue in entry.get('critical_issues', []) or []:
-            name = issue.get('module_name') or issue.get('id') or (issue.get('finding') or {}).get('name')
+            name = issue.module_name or issue.id or (issue.finding or {}).get('name')
             if not name:
                 continue
 
-            finding = issue.get('finding') or {}
+            # The same module names and versions recur across many issues and
+            # projects, so intern them and key counts on (name, version) tuples;
+            # "module@version" strings are only built for the output
+            name = sys.intern(name)
+            finding = issue.finding or {}
             nodes = finding.get('nodes') or []
-            found_any = False
-            for node in nodes:
-                fs_path = node_path_to_fs_path(node, proj)
-                cur = fs_path
-                for _ in range(6):
-                    if os.path.isdir(cur):
-                        ver = read_package_version(cur)
-                        if ver:
-                            counts[f"{name}@{ver}"] += 1
-                            examples[name].append({'version': ver, 'path': cur})
-                            found_any = True
-                            break
-                    parent = os.path.dirname(cur)
-                    if not parent or parent == cur:
-                        break
-                    cur = parent
-                if found_any:
-                    break
-
-            if not found_any:
-                rng = finding.get('range') or issue.get('range') or 'unknown'
-                counts[f"{name}@{rng}"] += 1
-                examples[name].append({'version': rng, 'path': None})
+            ver, path = _find_version_from_nodes(tuple(nodes) if isinstance(nodes, list) else (), proj)
+            if not ver:
+                ver = finding.get('range') or 'unknown'
+                path = None
+            ver = sys.intern(str(ver))
+            counts[(name, ver)] += 1
+            examples[name].append({'version': ver, 'path': path})
+            columns['module'].append(name)
+            columns['version'].append(ver)
+            columns['path'].append(path)
+            columns['project'].append(proj)
 
     summary: Dict[str, Any] = {
         'distinct_module_versions': len(counts),
@@ -427,18 +815,13 @@ def summarize_critical_versions(report: Dict[str, Any], output_path: str, top_n:
         'top': []
     }
 
-    # Build items and sort by module name ascending (case-insensitive), then version
-    items: List[Tuple[str, str, int]] = []
-    for k, v in counts.items():
-        module, ver = k.split('@', 1)
-        items.append((module, ver, v))
-
-    sorted_items = sorted(items, key=lambda x: (x[0].lower(), x[1]))
+    # Sort by module name ascending (case-insensitive), then version
+    sorted_items = sorted(counts.items(), key=lambda x: (x[0][0].lower(), x[0][1]))
     selected = sorted_items if top_n is None else sorted_items[:top_n]
-    for module, ver, v in selected:
+    for (module, ver), v in selected:
         summary['top'].append({'module': module, 'version': ver, 'count': v})
 
-    out = {'summary': summary, 'counts': dict(counts), 'examples': examples}
+    out = {'summary': summary, 'counts': {f"{module}@{ver}": v for (module, ver), v in counts.items()}, 'examples': examples}
     out['generated_at'] = datetime.now().astimezone().isoformat()
 
     with open(output_path, 'w', encoding='utf-8') as f:
@@ -451,6 +834,8 @@ def summarize_critical_versions(report: Dict[str, Any], output_path: str, top_n:
     for t in summary['top']:
         print(f"- {t['module']}@{t['version']}: {t['count']}")
 
+    return write_occurrence_table(columns, os.path.splitext(output_path)[0])
+
 
 if __name__ == '__main__':
     raise SystemExit(main())